@@ -0,0 +1,99 @@
+import os
+import subprocess
+import tempfile
+
+import fitz
+
+from tikz import LatexError, cfg
+from tikz.picture import Picture, _compiled_pdfs
+
+
+def compile_all(pictures):
+    """
+    compile several pictures with as few LaTeX runs as possible
+
+    Compiling each `Picture` separately pays the fixed LaTeX startup cost —
+    dominated by loading TikZ — once per picture. This emits pictures into
+    one `standalone`-class document per distinct preamble (one
+    tightly-cropped page per picture), compiles each document once, and
+    splits the resulting PDF back into the per-picture files with PyMuPDF,
+    so the fixed cost is paid once per batch.
+
+    Pictures are grouped by preamble because each picture's PDF is cached
+    under a hash covering only its own preamble; rendering it under another
+    picture's preamble would poison the cache. Pictures whose PDF is
+    already cached are skipped. After the call, each picture behaves as if
+    it had been compiled individually (`write_image`, `show` etc. find
+    their PDF).
+    """
+    # determine which pictures actually need compiling
+    pending = []
+    for picture in pictures:
+        assert isinstance(picture, Picture)
+        if not picture.cache:
+            # a cache=False picture must not leave hash-named artifacts
+            # behind; leave it to individual compilation
+            continue
+        if picture.document_codes:
+            # extra document code cannot be represented in the batch
+            # document, but is part of the picture's hash; batching such a
+            # picture would register the wrong artifact under that hash, so
+            # leave it to individual compilation
+            continue
+        picture._update(build=False)
+        if os.path.isfile(picture.temp_pdf):
+            continue
+        cached = _compiled_pdfs.get(picture._last_hash)
+        if cached is not None and os.path.isfile(cached):
+            picture.temp_pdf = cached
+            continue
+        pending.append(picture)
+    if not pending:
+        return
+
+    # one batch per distinct preamble
+    groups = {}
+    for picture in pending:
+        groups.setdefault(tuple(picture.preamble), []).append(picture)
+    for preamble, group in groups.items():
+        _compile_batch(list(preamble), group)
+
+
+def _compile_batch(preamble, pending):
+    "compile pictures sharing one preamble into one document and demux it"
+    # one standalone page per picture
+    codelines = [r"\documentclass[tikz]{standalone}"]
+    codelines += preamble
+    codelines.append(r"\begin{document}")
+    codelines += [picture._code for picture in pending]
+    codelines.append(r"\end{document}")
+    code = "\n".join(codelines)
+
+    # compile in a dedicated temporary directory, cleaned up on exit from
+    # the block
+    with tempfile.TemporaryDirectory(prefix="tikz-batch-") as tempdir:
+        temp_tex = os.path.join(tempdir, "tikz.tex")
+        with open(temp_tex, "w") as f:
+            f.write(code + "\n")
+        completed = subprocess.run(
+            [cfg.latex, "-interaction=batchmode", "-halt-on-error", "tikz.tex"],
+            cwd=tempdir,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise LatexError("LaTeX has failed\n" + completed.stdout)
+
+        # demux the pages back to the individual pictures
+        batch_pdf = fitz.open(os.path.join(tempdir, "tikz.pdf"))
+        if batch_pdf.page_count != len(pending):
+            raise LatexError(
+                f"batch compilation produced {batch_pdf.page_count} pages "
+                f"for {len(pending)} pictures"
+            )
+        for i, picture in enumerate(pending):
+            single = fitz.open()
+            single.insert_pdf(batch_pdf, from_page=i, to_page=i)
+            single.save(picture.temp_pdf)
+            _compiled_pdfs[picture._last_hash] = picture.temp_pdf
+        batch_pdf.close()
@@ -6,16 +6,43 @@ if TYPE_CHECKING:
 
 
 class ToTikzCodeMixin(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def to_code(self) -> str:
         raise NotImplementedError()
 
 
 class WithOptionsMixin(ABC):
+    __slots__ = ("_option", "_opt_code")
+
     def __init__(self, *, opt: "options.OptsLike"):
         from tikz import options
 
         self._option = options.Opts.normalise(opt=opt)
+        # Options are effectively immutable after construction, so the code
+        # string is computed once here instead of on every `_code` call.
+        self._opt_code = self._option.to_code()
 
     def get_opt_code(self) -> str:
-        return self._option.to_code()
+        return self._opt_code
+
+    def get_opt_code_with(self, **kw_option) -> str:
+        """
+        option code with additional per-render keys merged in
+
+        Used by operations whose options depend on the coordinate
+        transformation (e.g. radii, grid steps), which therefore cannot be
+        baked into the precomputed code string.
+        """
+        if not kw_option:
+            return self._opt_code
+        from tikz import options
+
+        merged = dict(self._option.kw_option)
+        merged.update(kw_option)
+        return options.Opts(
+            *self._option.options,
+            underscore_to_space=self._option.underscore_to_space,
+            **merged,
+        ).to_code()
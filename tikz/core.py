@@ -9,7 +9,8 @@ notebook seamless.
    :start-line: 4
 """
 
-import numbers
+import re
+from functools import lru_cache
 from typing import Iterable, Union
 
 import numpy as np
@@ -40,6 +41,24 @@ class cfg:
     name of the executable used to compile the LaTeX document
     """
 
+    cache_size = 256 * 2**20
+    """
+    maximum size in bytes of the on-disk PDF cache
+
+    Compiled PDFs are kept in a user-level cache directory across sessions;
+    when their total size exceeds this limit, the least recently used ones
+    are evicted. The default is 256 MB.
+    """
+
+    display_png_alpha = False
+    """
+    whether PNGs rendered for display in the notebook have an alpha channel
+
+    The default is `False`: opaque RGB pixmaps are a third smaller, and the
+    notebook shows the picture on a background anyway. PNG files written by
+    `Picture.write_image` are not affected and keep their alpha channel.
+    """
+
     demo_template = "\n".join(
         [
             '<div style="background-color:#e0e0e0;margin:0">',
@@ -68,21 +87,6 @@ class cfg:
 # helper functions and helper-helper functions
 
 
-def _option_code(key, val):
-    """
-    returns TikZ code for single option
-
-    helper function for `_options`
-    """
-    # replace underscores by spaces
-    key = str(key).replace("_", " ")
-    if val is True:
-        # omit `=True`
-        return key
-    else:
-        return f"{key}={str(val)}"
-
-
 # check types
 def _str(obj):
     return isinstance(obj, str)
@@ -92,8 +96,14 @@ def _tuple(obj):
     return isinstance(obj, tuple)
 
 
+# Concrete types checked by `_numeric`. A plain-tuple `isinstance` check is
+# several times faster than `isinstance(obj, numbers.Real)`, which goes
+# through the ABC subclass-hook machinery on every call.
+_NUMERIC_TYPES = (int, float, np.floating, np.integer)
+
+
 def _numeric(obj):
-    return isinstance(obj, numbers.Real)
+    return isinstance(obj, _NUMERIC_TYPES)
 
 
 def _str_or_numeric(obj):
@@ -111,34 +121,45 @@ def _list(obj):
 def _coordinate(coord):
     """
     check and normalize coordinate
+
+    Called for every path operation; type checks are performed through direct
+    `isinstance` calls instead of the `_str` etc. helpers to avoid the
+    per-call function overhead on this hot construction path.
     """
     # A coordinate can be a string with enclosing parentheses, possibly
     # prefixed by `+` or `++`, or the string 'cycle'.
-    if _str(coord) and (
+    if isinstance(coord, str) and (
         (coord.startswith(("(", "+(", "++(")) and coord.endswith(")"))
         or coord == "cycle"
     ):
         return coord
     # A coordinate can be a 2/3-element tuple containing strings or numbers:
-    if (
-        _tuple(coord)
-        and len(coord) in [2, 3]
-        and all(_str_or_numeric(x) for x in coord)
-    ):
+    if isinstance(coord, tuple) and len(coord) in [2, 3]:
+        # Classify the elements in a single pass instead of one `all()` scan
+        # per possible outcome.
+        num_str = 0
+        num_numeric = 0
+        for x in coord:
+            if isinstance(x, str):
+                num_str += 1
+            elif _numeric(x):
+                num_numeric += 1
+            else:
+                raise TypeError(f"{coord} is not a coordinate")
         # If all strings, normalize to string.
-        if all(_str(x) for x in coord):
+        if num_str == len(coord):
             return "(" + ",".join(coord) + ")"
         # If all numbers, normalize to ndarray.
-        if all(_numeric(x) for x in coord):
+        if num_numeric == len(coord):
             return np.array(coord)
         # If mixed, keep.
         return coord
-    # A coordinate can be a 2/3-element 1d-ndarray.
+    # A coordinate can be a numeric 2/3-element 1d-ndarray.
     if (
-        _ndarray(coord)
+        isinstance(coord, np.ndarray)
         and coord.ndim == 1
         and coord.size in [2, 3]
-        and all(_numeric(x) for x in coord)
+        and np.issubdtype(coord.dtype, np.number)
     ):
         return coord
     # Otherwise, report error.
@@ -151,24 +172,44 @@ def _sequence(seq, accept_coordinate=True):
 
     accept_coordinate: whether to accept a single coordinate
     """
+    # A sequence can be a numeric 2d-ndarray with 2 or 3 columns. This is
+    # checked first so that already-normalized arrays — the common case when
+    # coordinates come from computation — return immediately; the dtype
+    # check is O(1), unlike a per-element `_numeric` scan.
+    if (
+        isinstance(seq, np.ndarray)
+        and seq.ndim == 2
+        and seq.shape[1] in [2, 3]
+        and np.issubdtype(seq.dtype, np.number)
+    ):
+        return seq
     # A sequence can be a list.
-    if _list(seq):
+    if isinstance(seq, list):
+        # A list of all-numeric tuples — the common way to hand over computed
+        # points — is converted with a single bulk `np.asarray` instead of
+        # one tiny `np.array` allocation per tuple in `_coordinate`.
+        if seq and all(
+            isinstance(coord, tuple) and all(_numeric(x) for x in coord)
+            for coord in seq
+        ):
+            try:
+                arr = np.asarray(seq, dtype=np.float64)
+            except ValueError:
+                # ragged tuples; leave it to the per-coordinate path to report
+                pass
+            else:
+                if arr.ndim == 2 and arr.shape[1] in [2, 3]:
+                    return arr
         # Normalize contained coordinates.
         seq = [_coordinate(coord) for coord in seq]
-        # If all coordinates are 1d-ndarrays, make the sequence a 2d-ndarray.
-        if all(_ndarray(coord) for coord in seq) and all(
-            coord.size == seq[0].size for coord in seq
+        # If all coordinates are 1d-ndarrays of the same size, make the
+        # sequence a 2d-ndarray. (single pass instead of two `all()` scans)
+        if all(
+            isinstance(coord, np.ndarray) and coord.size == seq[0].size
+            for coord in seq
         ):
             return np.array(seq)
         return seq
-    # A sequence can be a numeric 2d-ndarray with 2 or 3 columns.
-    if (
-        _ndarray(seq)
-        and seq.ndim == 2
-        and seq.shape[1] in [2, 3]
-        and all(_numeric(x) for x in seq.flat)
-    ):
-        return seq
     # Optionally accept a coordinate and turn it into a 1-element sequence.
     if accept_coordinate:
         return _sequence([seq])
@@ -176,6 +217,25 @@ def _sequence(seq, accept_coordinate=True):
     raise TypeError(f"{seq} is not a sequence of coordinates")
 
 
+# precomputed formatter and trailing-'0'/'.' stripper for `_str_or_numeric_code`
+# Binding the bound method and the compiled pattern's `sub` once at import time
+# avoids rebuilding them for every coordinate element on the hot rendering path.
+_FMT = "{:.5f}".format
+_TRAIL = re.compile(r"\.?0+$").sub
+
+
+@lru_cache(maxsize=32768)
+def _numeric_code(x):
+    """
+    returns fixed-point TikZ representation of a number
+
+    Figures tend to reuse the same values many times (ticks, grid points,
+    integer coordinates), so the formatted string is memoized; a repeat value
+    costs one C-level cache lookup instead of the format-and-strip pipeline.
+    """
+    return _TRAIL("", _FMT(x))
+
+
 def _str_or_numeric_code(x):
     """
     transform element of coordinate into TikZ representation
@@ -184,13 +244,12 @@ def _str_or_numeric_code(x):
     fixed-point representation with 5 decimals precision (TikZ: ±16383.99999)
     without trailing '0's or '.'
     """
-    if _str(x):
+    if isinstance(x, str):
         # leave string as-is
         return x
-    else:
-        # convert numeric elements to a fixed-point representation with 5
-        # decimals precision (TikZ: ±16383.99999) without trailing '0's or '.'
-        return "{:.5f}".format(x).rstrip("0").rstrip(".")
+    # convert numeric elements to a fixed-point representation with 5
+    # decimals precision (TikZ: ±16383.99999) without trailing '0's or '.'
+    return _numeric_code(x)
 
 
 def _coordinate_code(coord, trans=None):
@@ -205,6 +264,28 @@ def _coordinate_code(coord, trans=None):
         return "(" + ",".join(map(_str_or_numeric_code, coord)) + ")"
 
 
+def _format_numeric_block(arr):
+    """
+    returns list of TikZ coordinate codes for a 2d-ndarray of coordinates
+
+    Vectorized equivalent of calling `_coordinate_code` on every row: all
+    elements are formatted with 5 decimals precision and stripped of trailing
+    '0's and '.' in a single NumPy operation, which is much faster than
+    per-element Python formatting for large coordinate sequences.
+    """
+    s = np.char.mod("%.5f", arr)
+    s = np.char.rstrip(np.char.rstrip(s, "0"), ".")
+    if len(s) < 64:
+        # for short sequences the Python loop is cheaper than the
+        # fixed per-call overhead of the `np.char` kernels below
+        return ["(" + ",".join(row) + ")" for row in s.tolist()]
+    # build whole coordinate strings in C: "(" + col0 + "," + col1 [...] + ")"
+    rows = np.char.add("(", s[:, 0])
+    for j in range(1, s.shape[1]):
+        rows = np.char.add(np.char.add(rows, ","), s[:, j])
+    return np.char.add(rows, ")").tolist()
+
+
 # coordinates
 
 
@@ -223,6 +304,8 @@ class Raw:
     objects internally.
     """
 
+    __slots__ = ("string",)
+
     def __init__(self, string):
         self.string = string
 
@@ -251,6 +334,8 @@ class Operation(WithOptionsMixin):
     This is an abstract superclass that is not to be instantiated.
     """
 
+    __slots__ = ()
+
     def __init__(self, opt: OptsLike):
         super().__init__(opt=opt)
 
@@ -268,6 +353,8 @@ class moveto(Operation):
     See [§14.1](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.1)
     """
 
+    __slots__ = ("coords",)
+
     def __init__(self, coords, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -276,7 +363,14 @@ class moveto(Operation):
     def _code(self, trans=None):
         # put move-to operation before each coordinate,
         # for the first one implicitly
-        return " ".join(_coordinate_code(coord, trans) for coord in self.coords)
+        if _ndarray(self.coords):
+            # Transformations are applied to the whole (N, d) array at once;
+            # they must therefore be broadcasting-aware (see `Axes`).
+            coords = self.coords if trans is None else np.asarray(trans(self.coords))
+            return " ".join(_format_numeric_block(coords))
+        # bind the global lookup once outside the loop
+        cc = _coordinate_code
+        return " ".join([cc(coord, trans) for coord in self.coords])
 
 
 class lineto(Operation):
@@ -291,6 +385,8 @@ class lineto(Operation):
     see [§14.2](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.2)
     """
 
+    __slots__ = ("coords", "op")
+
     def __init__(self, coords, op="--", opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -299,8 +395,15 @@ class lineto(Operation):
 
     def _code(self, trans=None):
         # put line-to operation before each coordinate
+        if _ndarray(self.coords):
+            # transform the whole array at once, see `moveto._code`
+            coords = self.coords if trans is None else np.asarray(trans(self.coords))
+            return f"{self.op} " + f" {self.op} ".join(
+                _format_numeric_block(coords)
+            )
+        cc = _coordinate_code
         return f"{self.op} " + f" {self.op} ".join(
-            _coordinate_code(coord, trans) for coord in self.coords
+            [cc(coord, trans) for coord in self.coords]
         )
 
 
@@ -311,6 +414,8 @@ class line(Operation):
     Starts with move-to instead of line-to operation.
     """
 
+    __slots__ = ("coords", "op")
+
     def __init__(self, coords, op="--", opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -320,8 +425,13 @@ class line(Operation):
     def _code(self, trans=None):
         # put line-to operation between coordinates
         # (implicit move-to before first)
+        if _ndarray(self.coords):
+            # transform the whole array at once, see `moveto._code`
+            coords = self.coords if trans is None else np.asarray(trans(self.coords))
+            return f" {self.op} ".join(_format_numeric_block(coords))
+        cc = _coordinate_code
         return f" {self.op} ".join(
-            _coordinate_code(coord, trans) for coord in self.coords
+            [cc(coord, trans) for coord in self.coords]
         )
 
 
@@ -334,6 +444,8 @@ class curveto(Operation):
     see [§14.3](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.3)
     """
 
+    __slots__ = ("coord", "control1", "control2")
+
     def __init__(self, coord, control1, control2=None, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -345,11 +457,12 @@ class curveto(Operation):
             self.control2 = None
 
     def _code(self, trans=None):
-        code = ".. controls " + _coordinate_code(self.control1, trans)
+        # assemble fragments into a list and join once
+        parts = [".. controls ", _coordinate_code(self.control1, trans)]
         if self.control2 is not None:
-            code += " and " + _coordinate_code(self.control2, trans)
-        code += " .." + " " + _coordinate_code(self.coord, trans)
-        return code
+            parts.append(" and " + _coordinate_code(self.control2, trans))
+        parts.append(" .. " + _coordinate_code(self.coord, trans))
+        return "".join(parts)
 
 
 class rectangle(Operation):
@@ -361,6 +474,8 @@ class rectangle(Operation):
     see [§14.4](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.4)
     """
 
+    __slots__ = ("coord",)
+
     def __init__(self, coord, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinate
@@ -384,6 +499,8 @@ class circle(Operation):
     see [§14.6](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.6)
     """
 
+    __slots__ = ("x_radius", "y_radius", "at")
+
     def __init__(
         self, radius=None, x_radius=None, y_radius=None, at=None, opt: OptsLike = None
     ):
@@ -403,7 +520,7 @@ class circle(Operation):
             self.at = None
 
     def _code(self, trans=None):
-        kwoptions = self.kwoptions
+        kwoptions = {}
         x_radius, y_radius = self.x_radius, self.y_radius
         if trans is not None:
             x_radius, y_radius = trans(x_radius, y_radius)
@@ -413,8 +530,10 @@ class circle(Operation):
             kwoptions["x_radius"] = x_radius
             kwoptions["y_radius"] = y_radius
         if self.at is not None:
-            kwoptions["at"] = _coordinate_code(self.at, None)
-        return "circle" + self.get_opt_code()
+            # pgfkeys splits option lists on commas at brace level 0, so the
+            # coordinate's own comma needs bracing: `at={(1,1)}`
+            kwoptions["at"] = "{" + _coordinate_code(self.at, None) + "}"
+        return "circle" + self.get_opt_code_with(**kwoptions)
 
 
 class arc(Operation):
@@ -428,6 +547,8 @@ class arc(Operation):
     see [§14.7](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.7)
     """
 
+    __slots__ = ("x_radius", "y_radius")
+
     def __init__(self, radius=None, x_radius=None, y_radius=None, opt: OptsLike = None):
         super().__init__(opt=opt)
         # overriding logic
@@ -440,7 +561,7 @@ class arc(Operation):
             self.y_radius = y_radius
 
     def _code(self, trans=None):
-        kwoptions = self.kwoptions
+        kwoptions = {}
         x_radius, y_radius = self.x_radius, self.y_radius
         if trans is not None:
             x_radius, y_radius = trans(x_radius, y_radius)
@@ -449,7 +570,7 @@ class arc(Operation):
         else:
             kwoptions["x_radius"] = x_radius
             kwoptions["y_radius"] = y_radius
-        return "arc" + self.get_opt_code()
+        return "arc" + self.get_opt_code_with(**kwoptions)
 
 
 class grid(Operation):
@@ -464,6 +585,8 @@ class grid(Operation):
     see [§14.8](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.8)
     """
 
+    __slots__ = ("coord", "xstep", "ystep")
+
     def __init__(self, coord, step=None, xstep=None, ystep=None, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinate
@@ -478,7 +601,7 @@ class grid(Operation):
             self.ystep = ystep
 
     def _code(self, trans=None):
-        kwoptions = self.kwoptions
+        kwoptions = {}
         xstep, ystep = self.xstep, self.ystep
         if trans is not None:
             xstep, ystep = trans(xstep, ystep)
@@ -487,7 +610,12 @@ class grid(Operation):
         else:
             kwoptions["xstep"] = xstep
             kwoptions["ystep"] = ystep
-        return "grid" + self.get_opt_code() + " " + _coordinate_code(self.coord, trans)
+        return (
+            "grid"
+            + self.get_opt_code_with(**kwoptions)
+            + " "
+            + _coordinate_code(self.coord, trans)
+        )
 
 
 class parabola(Operation):
@@ -499,6 +627,8 @@ class parabola(Operation):
     see [§14.9](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.9)
     """
 
+    __slots__ = ("coord", "bend")
+
     def __init__(self, coord, bend=None, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -509,11 +639,12 @@ class parabola(Operation):
             self.bend = None
 
     def _code(self, trans=None):
-        code = "parabola" + self.get_opt_code()
+        # assemble fragments into a list and join once
+        parts = ["parabola", self.get_opt_code()]
         if self.bend is not None:
-            code += " bend " + _coordinate_code(self.bend, trans)
-        code += " " + _coordinate_code(self.coord, trans)
-        return code
+            parts.append(" bend " + _coordinate_code(self.bend, trans))
+        parts.append(" " + _coordinate_code(self.coord, trans))
+        return "".join(parts)
 
 
 class sin(Operation):
@@ -525,6 +656,8 @@ class sin(Operation):
     see [§14.10](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.10)
     """
 
+    __slots__ = ("coord",)
+
     def __init__(self, coord, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinate
@@ -543,6 +676,8 @@ class cos(Operation):
     see [§14.10](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.10)
     """
 
+    __slots__ = ("coord",)
+
     def __init__(self, coord, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinate
@@ -561,6 +696,8 @@ class topath(Operation):
     see [§14.13](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsection.14.13)
     """
 
+    __slots__ = ("coord",)
+
     def __init__(self, coord, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinate
@@ -590,6 +727,8 @@ class node(Operation):
     see [§17](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#section.17)
     """
 
+    __slots__ = ("name", "contents", "at", "headless")
+
     # Provides 'headless' mode for `Scope.node` and `Scope.coordinate`
     def __init__(
         self, contents, name=None, at=None, _headless=False, opt: OptsLike = None
@@ -605,16 +744,14 @@ class node(Operation):
         self.headless = _headless
 
     def _code(self, trans=None):
-        if not self.headless:
-            code = "node"
-        else:
-            code = ""
-        code += self.get_opt_code()
+        # assemble fragments into a list and join once
+        parts = ["" if self.headless else "node", self.get_opt_code()]
         if self.name is not None:
-            code += f" ({self.name})"
+            parts.append(f" ({self.name})")
         if self.at is not None:
-            code += " at " + _coordinate_code(self.at, trans)
-        code += " {" + self.contents + "}"
+            parts.append(" at " + _coordinate_code(self.at, trans))
+        parts.append(" {" + self.contents + "}")
+        code = "".join(parts)
         if self.headless:
             code = code.lstrip()
         return code
@@ -638,6 +775,8 @@ class coordinate(Operation):
     [§17.2.1](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#subsubsection.17.2.1)
     """
 
+    __slots__ = ("name", "at", "headless")
+
     def __init__(self, name, at=None, _headless=False, opt: OptsLike = None):
         super().__init__(opt=opt)
         self.name = name
@@ -649,14 +788,15 @@ class coordinate(Operation):
         self.headless = _headless
 
     def _code(self, trans=None):
-        if not self.headless:
-            code = "coordinate"
-        else:
-            code = ""
-        code += self.get_opt_code()
-        code += f" ({self.name})"
+        # assemble fragments into a list and join once
+        parts = [
+            "" if self.headless else "coordinate",
+            self.get_opt_code(),
+            f" ({self.name})",
+        ]
         if self.at is not None:
-            code += " at " + _coordinate_code(self.at, trans)
+            parts.append(" at " + _coordinate_code(self.at, trans))
+        code = "".join(parts)
         if self.headless:
             code = code.lstrip()
         return code
@@ -679,6 +819,8 @@ class plot(Operation):
     see [§22](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#section.22)
     """
 
+    __slots__ = ("coords", "to")
+
     def __init__(self, coords, to=False, opt: OptsLike = None):
         super().__init__(opt=opt)
         # normalize coordinates
@@ -693,11 +835,14 @@ class plot(Operation):
         else:
             code = "plot"
         code += self.get_opt_code()
-        code += (
-            " coordinates {"
-            + " ".join(_coordinate_code(coord, trans) for coord in self.coords)
-            + "}"
-        )
+        if _ndarray(self.coords):
+            # transform the whole array at once, see `moveto._code`
+            coords = self.coords if trans is None else np.asarray(trans(self.coords))
+            coordinate_codes = _format_numeric_block(coords)
+        else:
+            cc = _coordinate_code
+            coordinate_codes = [cc(coord, trans) for coord in self.coords]
+        code += " coordinates {" + " ".join(coordinate_codes) + "}"
         return code
 
 
@@ -759,6 +904,8 @@ class Action(WithOptionsMixin):
     see [§15](https://pgf-tikz.github.io/pgf/pgfmanual.pdf#section.15)
     """
 
+    __slots__ = ("action_name", "spec")
+
     def __init__(self, action_name, *spec, opt: OptsLike = None):
         super().__init__(opt=opt)
         self.action_name = action_name
@@ -767,14 +914,11 @@ class Action(WithOptionsMixin):
 
     def _code(self, trans=None):
         "returns TikZ code"
-        return (
-            "\\"
-            + self.action_name
-            + self.get_opt_code()
-            + " "
-            + " ".join(op._code(trans) for op in self.spec)
-            + ";"
-        )
+        # assemble fragments into a list and join once
+        parts = ["\\", self.action_name, self.get_opt_code(), " "]
+        parts.append(" ".join([op._code(trans) for op in self.spec]))
+        parts.append(";")
+        return "".join(parts)
 
 
 # environments
@@ -488,7 +488,24 @@ class Axes(Scope):
 
         # Transformation which maps coordinates from the axis' ranges
         # onto [0, 1], to be passed to *`.code()` and `_coordinate_code`.
+        # It is broadcasting-aware: a whole `(N, 2)` coordinate array is
+        # transformed in one vectorized pass instead of per coordinate.
         def transformation(coord):
+            if isinstance(coord, np.ndarray) and coord.ndim == 2:
+                x = coord[:, 0]
+                y = coord[:, 1]
+                n = np.count_nonzero((x < cxmin) | (x > cxmax))
+                if n > 0:
+                    print(f"Warning: {n} x coordinates clipped to"
+                          f" [{cxmin}, {cxmax}].")
+                n = np.count_nonzero((y < cymin) | (y > cymax))
+                if n > 0:
+                    print(f"Warning: {n} y coordinates clipped to"
+                          f" [{cymin}, {cymax}].")
+                out = np.empty((coord.shape[0], 2))
+                out[:, 0] = (np.clip(x, cxmin, cxmax) - xmin) / xrange
+                out[:, 1] = (np.clip(y, cymin, cymax) - ymin) / yrange
+                return out
             cx, cy = coord
             if not isinstance(cx, str):
                 # check too large
@@ -570,7 +587,7 @@ class Axes(Scope):
     # Axes options yaxis= 'left', 'right', None
     # privatize xaxis, yaxis?
 
-    def _code(self):
-        "returns TikZ code"
-        code = self.decorations._code() + "\n" + super()._code(self.trans)
-        return code
+    def _emit(self, out, trans=None):
+        "emits TikZ code fragments, applying the axes transformation"
+        self.decorations._emit(out)
+        super()._emit(out, self.trans)
@@ -1,10 +1,68 @@
+import sys
 from functools import lru_cache
 from typing import Iterable, Union, Dict
 
 from .capability import ToTikzCodeMixin
 
 
+def _nested_str_list_to_str(obj):
+    """
+    flatten a possibly nested list/tuple of option strings into one string
+
+    Nested comma-joins are equivalent to a single join over the leaves, so
+    the nesting is unwound iteratively with an explicit stack instead of the
+    former recursion-plus-generator cascade.
+    """
+    if obj is None:
+        return ""
+    if isinstance(obj, str):
+        return obj
+    if not isinstance(obj, (list, tuple)):
+        return str(obj)
+    parts = []
+    stack = list(reversed(obj))
+    while stack:
+        o = stack.pop()
+        if isinstance(o, str):
+            parts.append(o)
+        elif isinstance(o, (list, tuple)):
+            stack.extend(reversed(o))
+        elif o is None:
+            parts.append("")
+        else:
+            parts.append(str(o))
+    return ",".join(parts)
+
+
+def _freeze(obj):
+    """
+    recursively convert lists/tuples into tuples
+
+    Options are frozen at construction time so that `Opts` objects are
+    hashable and equal option sets share a single cached code string.
+    """
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(o) for o in obj)
+    return obj
+
+
+@lru_cache(maxsize=4096)
+def _opts_to_code(opts: "Opts", without_bracket: bool) -> str:
+    """
+    cached option-code assembly
+
+    Because `Opts` hashes and compares by content, distinct instances with
+    identical options (the common case for figures that reuse a few styles)
+    share one cache entry, instead of re-assembling the same string per call.
+    The result is interned, so the small set of recurring option strings
+    (`[thick]`, `[->]`, ...) is stored once and compares by identity.
+    """
+    return sys.intern(opts._assemble_code(without_bracket))
+
+
 class Opts(ToTikzCodeMixin):
+    __slots__ = ("options", "kw_option", "underscore_to_space")
+
     def __init__(
         self,
         *option: Iterable[str],
@@ -12,51 +70,83 @@ class Opts(ToTikzCodeMixin):
         **kw_option,
     ):
         assert isinstance(option, (list, tuple))
-        self.options = option
+        self.options = _freeze(option)
         self.kw_option = kw_option
         self.underscore_to_space = underscore_to_space
 
+    def __hash__(self):
+        return hash(
+            (
+                self.options,
+                tuple(self.kw_option.items()),
+                self.underscore_to_space,
+            )
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Opts):
+            return NotImplemented
+        # compare kw_option order-sensitively, like `__hash__` and the
+        # emitted code: `[a=1,b=2]` and `[b=2,a=1]` are different strings
+        return (
+            self.options == other.options
+            and tuple(self.kw_option.items()) == tuple(other.kw_option.items())
+            and self.underscore_to_space == other.underscore_to_space
+        )
+
     def _normalise_key_val(self, key: str, val: Union[str, bool]) -> str:
+        # keys come from `**kw_option` and are always strings already
         if self.underscore_to_space:
-            key = str(key).replace("_", " ")
-        key_value_pair = [key]
-        if val is not True:
+            key = key.replace("_", " ")
+        if val is True:
             # tikz can omit value that is mapped to True value
             # omit `=True`
-            key_value_pair.append(val)
-        return "=".join(map(str, key_value_pair))
+            return key
+        return f"{key}={val}"
 
-    @classmethod
-    def _nested_str_list_to_str(cls, obj):
-        if obj is None:
-            return ""
-        if isinstance(obj, (list, tuple)):
-            return ",".join(map(str, (cls._nested_str_list_to_str(o) for o in obj)))
-        return str(obj)
-
-    # noinspection PyTypeChecker
-    @lru_cache()
-    def to_code(self, without_bracket: bool = False) -> str:
-        out = self._nested_str_list_to_str(self.options)
-        out += ",".join(
-            map(lambda x: self._normalise_key_val(*x), self.kw_option.items()),
-        )
+    def _assemble_code(self, without_bracket: bool) -> str:
+        parts = []
+        options = _nested_str_list_to_str(self.options)
+        if options:
+            parts.append(options)
+        if self.kw_option:
+            nkv = self._normalise_key_val
+            parts.append(",".join([nkv(k, v) for k, v in self.kw_option.items()]))
+        out = ",".join(parts)
         if not without_bracket and len(out) > 0:
             out = f"[{out}]"
         return out
 
+    # noinspection PyTypeChecker
+    def to_code(self, without_bracket: bool = False) -> str:
+        if not self.options and not self.kw_option:
+            # the extremely common `opt=None` case
+            return ""
+        try:
+            return _opts_to_code(self, without_bracket)
+        except TypeError:
+            # unhashable option values cannot be cached
+            return self._assemble_code(without_bracket)
+
     @classmethod
     def normalise(cls, opt: "OptsLike") -> "Opts":
+        if opt is None:
+            # share a single empty instance instead of allocating one per
+            # operation
+            return _EMPTY_OPTS
         if isinstance(opt, Opts):
             return opt
         if isinstance(opt, dict):
             return Opts(**opt)
         if isinstance(opt, str):
-            return Opts([opt])
+            return Opts(opt)
         return Opts(opt)
 
     def __repr__(self):
         return self.to_code()
 
 
+_EMPTY_OPTS = Opts()
+
+
 OptsLike = Union[Opts, str, Iterable[str], Dict]
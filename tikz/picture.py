@@ -1,11 +1,13 @@
-import atexit
 import base64
+import concurrent.futures
 import hashlib
 import html
 import os
+import pathlib
 import shutil
 import subprocess
 import tempfile
+from functools import lru_cache
 from typing import Optional
 
 import IPython.display
@@ -15,6 +17,105 @@ from tikz import StrOrIterableStr, StrOrIterableStr_normalise, cfg, LatexError
 from tikz.scope import Scope
 
 
+# PDFs compiled in this process, keyed by document hash. Shared across all
+# `Picture` instances so that re-creating an identical picture (e.g. when a
+# notebook cell is re-run) reuses the compiled PDF instead of spawning
+# another LaTeX process.
+_compiled_pdfs = {}
+
+# standard document preamble, ahead of user-added entries
+_STANDARD_PREAMBLE = [
+    r"\documentclass{article}",
+    r"\usepackage{tikz}",
+    r"\usetikzlibrary{external}",
+]
+
+# Appended after the user preamble and kept out of the preamble format
+# dump: \tikzexternalize decides whether this run is an externalization
+# child by inspecting \tikzexternalrealjob and \jobname at the moment it
+# executes, so it must execute in every compile — not once at dump time,
+# under the dump's jobname. The \csname marker is a no-op in a plain run;
+# under mylatexformat it ends the frozen preamble right before
+# \tikzexternalize, which therefore re-executes on every -fmt= run.
+_EXTERNALIZE_PREAMBLE = [
+    r"\csname endofdump\endcsname",
+    r"\tikzexternalize",
+]
+
+@lru_cache(maxsize=16)
+def _zoom_matrix(zoom):
+    "shared fitz zoom matrix; renders recur at a few standard dpi values"
+    return fitz.Matrix(zoom, zoom)
+
+
+# per-process scratch directory for LaTeX working files, created lazily;
+# the TemporaryDirectory finalizer removes it at interpreter exit
+_scratch_dir_obj = None
+
+
+def _scratch_dir():
+    """
+    per-process directory for LaTeX working files
+
+    The cache directory is shared between sessions and possibly between
+    concurrent processes, but the compile works with fixed file names
+    (tikz.tex, the log, the jobname output), which concurrent processes
+    would clobber. Compiles therefore run in this private scratch
+    directory, and only the finished, hash-named PDF is moved into the
+    shared cache.
+    """
+    global _scratch_dir_obj
+    if _scratch_dir_obj is None:
+        _scratch_dir_obj = tempfile.TemporaryDirectory(prefix="tikz-")
+    return pathlib.Path(_scratch_dir_obj.name)
+
+
+def _user_cache_dir():
+    "default directory for cached PDFs, shared across sessions"
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+        os.path.join("~", ".cache")
+    )
+    return os.path.join(base, "pytikz")
+
+
+def _trim_cache(dirpath):
+    """
+    evict least-recently-used cache files beyond `cfg.cache_size`
+
+    Only hash-named artifacts (`tikz-*.pdf` etc.) are considered; working
+    files like `tikz.tex` and precompiled preamble formats are left alone.
+    """
+    entries = []
+    total = 0
+    try:
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                if not entry.name.startswith("tikz-"):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_atime, st.st_size, entry.path))
+                total += st.st_size
+    except OSError:
+        return
+    if total <= cfg.cache_size:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= cfg.cache_size:
+            break
+
+
+# usability of precompiled preamble formats, keyed by (tempdir, format name):
+# True if the .fmt was dumped successfully, False if dumping or compiling
+# with it failed (e.g. mylatexformat is not installed)
+_preamble_fmts = {}
+
+
 class Picture(Scope):
     """
     tikzpicture environment
@@ -41,18 +142,42 @@ class Picture(Scope):
         **kwargs,
     ):
         super().__init__(**kwargs)
-        # additional preamble entries
+        # additional preamble entries; the list keeps the order, the set
+        # makes the duplicate check in `add_preamble` O(1)
         self.preamble = []
+        self._preamble_set = set()
         self.document_codes = []
         # should the created PDF be cached?
         self.cache = cache
-        # create temporary directory for pdflatex etc.
+        # rendered PNG/SVG data, keyed on the document hash (and dpi), so
+        # repeated notebook displays of an unchanged picture skip MuPDF
+        self._last_hash = None
+        self._preamble_hash = None
+        self._png_cache = {}
+        self._svg_cache = {}
+        # lazily opened PyMuPDF document of `temp_pdf`, shared between PNG
+        # and SVG rendering; see `_ensure_fitz`
+        self._fitz_doc = None
+        self._fitz_page = None
+        self._fitz_path = None
+        # working directory for pdflatex etc.; by default a user-level cache
+        # directory, so compiled PDFs survive the interpreter and re-running
+        # a script reuses them instead of compiling again
         if tempdir is None:
-            self.tempdir = tempfile.mkdtemp(prefix="tikz-")
-            # make sure it gets deleted
-            atexit.register(shutil.rmtree, self.tempdir, ignore_errors=True)
+            self.tempdir = _user_cache_dir()
+            os.makedirs(self.tempdir, exist_ok=True)
+            self._managed_cache = True
         else:
             self.tempdir = tempdir
+            self._managed_cache = False
+        self._tempdir_path = pathlib.Path(self.tempdir)
+        # LaTeX working files go into a per-process scratch directory when
+        # the shared cache directory is used; a user-supplied tempdir keeps
+        # the old behaviour of working in place
+        if self._managed_cache:
+            self._workdir_path = _scratch_dir()
+        else:
+            self._workdir_path = self._tempdir_path
 
         if usetikzlibrary is not None:
             self.usetikzlibrary(StrOrIterableStr_normalise(usetikzlibrary))
@@ -71,8 +196,11 @@ class Picture(Scope):
         If the method is called multiple times with the same arguments, the
         code is only added once.
         """
-        if code not in self.preamble:
+        if code not in self._preamble_set:
+            self._preamble_set.add(code)
             self.preamble.append(code)
+            self._preamble_hash = None
+            self._mark_dirty()
 
     def usetikzlibrary(self, name):
         """
@@ -108,6 +236,7 @@ class Picture(Scope):
 
     def add_document_code(self, code):
         self.document_codes.append(code)
+        self._mark_dirty()
 
     def fira(self):
         """
@@ -125,41 +254,65 @@ class Picture(Scope):
     # code / pdf creation: private
     # private functions assume that code / pdf has already been created
 
-    def _update(self, build=True):
-        "ensure that up-to-date code & PDF file exists"
+    def _update(self, build=True, draftmode=False):
+        """
+        ensure that up-to-date code & PDF file exists
+
+        With `draftmode=True` the LaTeX run checks the document and produces
+        metrics but skips PDF output generation, which is substantially
+        faster; use it when only compile errors are of interest.
+        """
 
-        sep = os.path.sep
+        if self._dirty or self._last_hash is None:
+            # create tikzpicture code; environments emit their fragments into
+            # one flat list, joined once at the end
+            out = [r"\begin{tikzpicture}" + self.get_opt_code()]
+            for el in self.elements:
+                if isinstance(el, Scope):
+                    el._emit(out)
+                else:
+                    out.append(el._code())
+            out.append(r"\end{tikzpicture}")
+            self._code = "\n".join(out)
+
+            # create document code
+            # standard and user-added preamble, then externalization setup
+            preamble_lines = (
+                list(_STANDARD_PREAMBLE) + self.preamble + _EXTERNALIZE_PREAMBLE
+            )
+            # document body; one flat list, no nested joins
+            body_lines = [r"\begin{document}"]
+            body_lines += self.document_codes
+            body_lines.append(self._code)
+            body_lines.append(r"\end{document}")
+            # The full document string is only joined on demand (writing the
+            # .tex file, `document_code()`), see `_get_document_code`.
+            self._document_lines = preamble_lines + body_lines
+            self._document_code = None
+
+            # This check is implemented by using a digest of the LaTeX code
+            # in the PDF filename, and to skip creation if that file exists.
+            # BLAKE2b is noticeably faster than SHA1 per byte hashed, and
+            # cryptographic strength is irrelevant for a cache key. The
+            # preamble rarely changes, so its digest is cached and folded
+            # into a digest of the (much more volatile) body.
+            if self._preamble_hash is None:
+                self._preamble_hash = hashlib.blake2b(
+                    "\n".join(preamble_lines).encode(), digest_size=20
+                ).digest()
+            digest = hashlib.blake2b(
+                "\n".join(body_lines).encode(), digest_size=20
+            )
+            digest.update(self._preamble_hash)
+            hash = digest.hexdigest()
+            if hash != self._last_hash:
+                # the picture changed; rendered output is stale
+                self._last_hash = hash
+                self._png_cache.clear()
+                self._svg_cache.clear()
+            self.temp_pdf = self._tempdir_path / ("tikz-" + hash + ".pdf")
+            self._dirty = False
 
-        # create tikzpicture code
-        code = (
-            r"\begin{tikzpicture}"
-            + self.get_opt_code()
-            + "\n"
-            + "\n".join(el._code() for el in self.elements)
-            + "\n"
-            + r"\end{tikzpicture}"
-        )
-        self._code = code
-
-        # create document code
-        # standard preamble
-        codelines = [
-            r"\documentclass{article}",
-            r"\usepackage{tikz}",
-            r"\usetikzlibrary{external}",
-            r"\tikzexternalize",
-        ]
-        # user-added preamble
-        codelines += self.preamble
-        # document body
-        codelines += [
-            r"\begin{document}",
-            "\n".join(self.document_codes),
-            self._code,
-            r"\end{document}",
-        ]
-        code = "\n".join(codelines)
-        self._document_code = code
         if not build:
             return
 
@@ -171,55 +324,215 @@ class Picture(Scope):
         # arguments directly. See section 53 of the PGF/TikZ manual.
 
         # does the PDF file have to be created?
-        #  This check is implemented by using the SHA1 digest of the LaTeX code
-        # in the PDF filename, and to skip creation if that file exists.
-        hash = hashlib.sha1(code.encode()).hexdigest()
-        self.temp_pdf = self.tempdir + sep + "tikz-" + hash + ".pdf"
-        if self.cache and os.path.isfile(self.temp_pdf):
-            return
-
-        # create LaTeX file
-        temp_tex = self.tempdir + sep + "tikz.tex"
+        if self.cache:
+            if os.path.isfile(self.temp_pdf):
+                return
+            # another Picture in this process may have compiled the same
+            # document already
+            cached = _compiled_pdfs.get(self._last_hash)
+            if cached is not None and os.path.isfile(cached):
+                self.temp_pdf = cached
+                return
+
+        # create LaTeX file (in the per-process working directory, so
+        # concurrent processes sharing the cache cannot clobber it)
+        temp_tex = self._workdir_path / "tikz.tex"
         with open(temp_tex, "w") as f:
-            f.write(code + "\n")
+            f.write(self._get_document_code() + "\n")
 
         # process LaTeX file into PDF
-        completed = subprocess.run(
-            [
-                cfg.latex,
-                "-jobname",
-                "tikz-figure0",
-                r"\def\tikzexternalrealjob{tikz}\input{tikz}",
-            ],
-            cwd=self.tempdir,
-            capture_output=True,
-            text=True,
-        )
+        fmt = self._get_preamble_fmt()
+        argv = [cfg.latex]
+        if fmt is not None:
+            argv.append("-fmt=" + fmt)
+        if draftmode:
+            argv += ["-interaction=batchmode", "-halt-on-error", "-draftmode"]
+        elif fmt is not None:
+            # a broken or stale format must not leave TeX waiting at its
+            # interactive prompt; errors surface through the plain retry
+            argv.append("-interaction=batchmode")
+        argv += [
+            "-jobname",
+            "tikz-figure0",
+            r"\def\tikzexternalrealjob{tikz}\input{tikz}",
+        ]
+        # The log is streamed to a file instead of being buffered and decoded
+        # in memory: it is only ever inspected when LaTeX fails.
+        log_path = self._workdir_path / "tikz.stdout"
+        with open(log_path, "wb") as log:
+            completed = subprocess.run(
+                argv,
+                cwd=self._workdir_path,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        if completed.returncode != 0 and fmt is not None:
+            # the precompiled preamble may be broken or stale; disable it and
+            # retry with a plain run before reporting an error
+            _preamble_fmts[(str(self._workdir_path), fmt)] = False
+            argv.remove("-fmt=" + fmt)
+            if not draftmode:
+                argv.remove("-interaction=batchmode")
+            with open(log_path, "wb") as log:
+                completed = subprocess.run(
+                    argv,
+                    cwd=self._workdir_path,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
         self.latex_completed = completed
         if completed.returncode != 0:
-            raise LatexError("LaTeX has failed\n" + completed.stdout)
+            with open(log_path, "rb") as f:
+                log_text = f.read().decode(errors="replace")
+            raise LatexError("LaTeX has failed\n" + log_text)
 
-        # rename created PDF file
-        os.rename(self.tempdir + sep + "tikz-figure0.pdf", self.temp_pdf)
+        if draftmode:
+            # no PDF has been produced
+            return
+
+        # move the created PDF from the working directory into place
+        src = self._workdir_path / "tikz-figure0.pdf"
+        if self._managed_cache:
+            # the scratch and cache directories may be on different
+            # filesystems; stage a copy next to the final name so the last
+            # step is an atomic rename within the shared directory
+            tmp = self.temp_pdf.with_name(
+                self.temp_pdf.name + f".{os.getpid()}.tmp"
+            )
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, self.temp_pdf)
+            os.remove(src)
+            # keep the shared cache directory bounded
+            _trim_cache(self.tempdir)
+        else:
+            os.replace(src, self.temp_pdf)
+        _compiled_pdfs[self._last_hash] = self.temp_pdf
 
-    def _get_SVG(self):
+    def _get_document_code(self):
+        "join the document lines, reusing the result until the next rebuild"
+        if self._document_code is None:
+            self._document_code = "\n".join(self._document_lines)
+        return self._document_code
+
+    def _get_preamble_fmt(self):
+        """
+        return the name of a precompiled preamble format, or None
+
+        The document preamble is stable across rebuilds of a picture, yet a
+        plain LaTeX run re-parses tikz.sty and friends every time. This dumps
+        the preamble once per unique preamble (keyed by its hash) into a
+        .fmt file via `mylatexformat`, which subsequent runs load instead.
+        The dump stops at the `\\endofdump` marker, so `\\tikzexternalize`
+        (which latches the jobname when it executes, see
+        `_EXTERNALIZE_PREAMBLE`) stays out of the format.
+        Returns None — and remembers the failure — if the dump does not
+        succeed, e.g. because `mylatexformat` is not installed.
+
+        Assumes the current document has been written to tikz.tex already.
+        """
+        h = hashlib.blake2b(
+            "\n".join(_STANDARD_PREAMBLE + self.preamble).encode(),
+            digest_size=20,
+        ).hexdigest()
+        name = "preamble-" + h
+        key = (str(self._workdir_path), name)
+        usable = _preamble_fmts.get(key)
+        if usable is None:
+            # dump the preamble (everything up to the \endofdump marker)
+            # into a format file
+            try:
+                completed = subprocess.run(
+                    [
+                        cfg.latex,
+                        "-ini",
+                        "-interaction=batchmode",
+                        "-jobname=" + name,
+                        "&" + cfg.latex,
+                        "mylatexformat.ltx",
+                        "tikz.tex",
+                    ],
+                    cwd=self._workdir_path,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.STDOUT,
+                )
+            except OSError:
+                # leave reporting a missing engine to the main compile
+                usable = False
+            else:
+                usable = completed.returncode == 0 and os.path.isfile(
+                    self._workdir_path / (name + ".fmt")
+                )
+            _preamble_fmts[key] = usable
+        return name if usable else None
+
+    def _ensure_fitz(self):
+        """
+        return the first page of `temp_pdf` as a PyMuPDF page
+
+        The document is opened and parsed only once and then reused, so that
+        rendering both a PNG and an SVG (as `_repr_mimebundle_` does) pays
+        the PDF-parse cost a single time. Re-opens when `temp_pdf` has
+        changed since the last call.
+        """
+        if self._fitz_page is None or self._fitz_path != self.temp_pdf:
+            self._fitz_doc = fitz.open(self.temp_pdf)
+            self._fitz_page = self._fitz_doc.load_page(0)
+            self._fitz_path = self.temp_pdf
+        return self._fitz_page
+
+    def _get_SVG(self, page=None):
         "return SVG data of `Picture`"
-        # convert PDF to SVG using PyMuPDF
-        doc = fitz.open(self.temp_pdf)
-        page = doc.load_page(0)
-        svg = page.get_svg_image()
+        svg = self._svg_cache.get(self._last_hash)
+        if svg is None:
+            # rendered SVGs are kept on disk beside the PDF, so an unchanged
+            # picture is served by a file read even in a fresh session
+            svg_path = self._tempdir_path / f"tikz-{self._last_hash}.svg"
+            if self.cache and svg_path.is_file():
+                svg = svg_path.read_text()
+            else:
+                # convert PDF to SVG using PyMuPDF
+                if page is None:
+                    page = self._ensure_fitz()
+                svg = page.get_svg_image()
+                if self.cache:
+                    svg_path.write_text(svg)
+            self._svg_cache[self._last_hash] = svg
         return svg
 
-    def _get_PNG(self, dpi=None):
+    def _get_PNG(self, dpi=None, page=None):
         "return PNG data of `Picture`"
         if dpi is None:
             dpi = cfg.display_dpi
-        # convert PDF to PNG using PyMuPDF
-        zoom = dpi / 72
-        doc = fitz.open(self.temp_pdf)
-        page = doc.load_page(0)
-        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
-        return pix.tobytes()
+        key = (self._last_hash, dpi)
+        data = self._png_cache.get(key)
+        if data is None:
+            # rendered PNGs are kept on disk beside the PDF (with the alpha
+            # setting in the name, since it changes the bytes), so an
+            # unchanged picture is served by a file read even in a fresh
+            # session
+            alpha = cfg.display_png_alpha
+            png_path = self._tempdir_path / "tikz-{}-{}{}.png".format(
+                self._last_hash, int(dpi), "a" if alpha else ""
+            )
+            if self.cache and png_path.is_file():
+                data = png_path.read_bytes()
+            else:
+                # convert PDF to PNG using PyMuPDF
+                zoom = dpi / 72
+                if page is None:
+                    page = self._ensure_fitz()
+                # render opaque RGB unless `cfg.display_png_alpha` asks for
+                # an alpha channel; dropping it shrinks the embedded bytes
+                pix = page.get_pixmap(
+                    matrix=_zoom_matrix(zoom),
+                    alpha=alpha,
+                    colorspace=fitz.csRGB,
+                )
+                data = pix.tobytes()
+                if self.cache:
+                    png_path.write_bytes(data)
+            self._png_cache[key] = data
+        return data
 
     # code / pdf creation: public
     # public functions make sure that code / pdf is created via `_update`
@@ -232,7 +545,7 @@ class Picture(Scope):
     def document_code(self):
         "returns LaTeX/TikZ code for a complete compilable document"
         self._update(build=False)
-        return self._document_code
+        return self._get_document_code()
 
     def write_image(self, filename, dpi=None):
         """
@@ -260,9 +573,8 @@ class Picture(Scope):
         elif ext.lower() == ".png":
             # render PDF as PNG using PyMuPDF
             zoom = dpi / 72
-            doc = fitz.open(self.temp_pdf)
-            page = doc.load_page(0)
-            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=True)
+            page = self._ensure_fitz()
+            pix = page.get_pixmap(matrix=_zoom_matrix(zoom), alpha=True)
             pix.save(filename)
         elif ext.lower() == ".svg":
             # convert PDF to SVG using PyMuPDF
@@ -279,8 +591,29 @@ class Picture(Scope):
         # Note that SVG rendering in the "plot viewer" is not entirely
         # accurate, see https://github.com/microsoft/vscode-python/issues/13080
         self._update()
-        data = {"image/png": self._get_PNG(), "image/svg+xml": self._get_SVG()}
-        return data
+        if (
+            (self._last_hash, cfg.display_dpi) in self._png_cache
+            and self._last_hash in self._svg_cache
+        ):
+            return {
+                "image/png": self._get_PNG(),
+                "image/svg+xml": self._get_SVG(),
+            }
+        # Both renders are pending; MuPDF releases the GIL during native
+        # rendering, so they can overlap in two threads. Documents are not
+        # thread-safe, so each worker opens its own.
+        pdf = self.temp_pdf
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as pool:
+            png = pool.submit(
+                lambda: self._get_PNG(page=fitz.open(pdf).load_page(0))
+            )
+            svg = pool.submit(
+                lambda: self._get_SVG(page=fitz.open(pdf).load_page(0))
+            )
+            return {
+                "image/png": png.result(),
+                "image/svg+xml": svg.result(),
+            }
 
     def safe_get_png(self, dpi):
         """
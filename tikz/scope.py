@@ -24,9 +24,31 @@ class Scope(WithOptionsMixin):
     def __exit__(self, exc_type, exc_val, exc_tb):
         return
 
-    def __init__(self, opt: OptsLike = None):
+    def __init__(self, opt: OptsLike = None, force_scope: bool = False):
         super().__init__(opt=opt)
+        # emit the scope wrapper even when it would carry no options; see
+        # `_emit`
+        self.force_scope = force_scope
         self.elements = []
+        # changed since the last render? maintained through `_mark_dirty`
+        self._dirty = True
+        self._parent = None
+        # memoized code fragments, see `_emit`
+        self._code_cache = None
+
+    def _mark_dirty(self):
+        """
+        flag this environment and all its ancestors as changed
+
+        Lets `Picture._update` skip rebuilding and rehashing the document
+        when nothing has been added since the last call, and drops the
+        memoized code fragments along the chain.
+        """
+        scope = self
+        while scope is not None:
+            scope._dirty = True
+            scope._code_cache = None
+            scope = scope._parent
 
     def _append(self, el):
         """
@@ -36,7 +58,10 @@ class Scope(WithOptionsMixin):
         actions), `Raw` objects (for other commands), or other environment
         objects.
         """
+        if isinstance(el, Scope):
+            el._parent = self
         self.elements.append(el)
+        self._mark_dirty()
 
     def scope(self, **kwargs):
         """
@@ -48,14 +73,77 @@ class Scope(WithOptionsMixin):
         self._append(s)
         return s
 
+    def _emit(self, out, trans=None):
+        """
+        append this environment's code fragments to `out`
+
+        Nested scopes emit into the same list, so the whole tree is
+        serialised with a single `"\\n".join` at the top level instead of
+        re-joining (and re-allocating) the code of every subtree at every
+        nesting level.
+
+        In the common untransformed case the fragments are memoized per
+        scope and reused until the scope (or a descendant) is mutated, so
+        re-serialising a static picture does not re-visit unchanged
+        subtrees.
+
+        A `\\begin{scope}...\\end{scope}` wrapper that carries no options
+        is pure parsing overhead for LaTeX and is elided — unless the scope
+        was created with `force_scope=True` or contains commands whose
+        effect the wrapper is meant to contain (raw code like `tikzset`,
+        or a `clip`).
+        """
+        if trans is None:
+            frags = self._code_cache
+            if frags is None:
+                wrap = self._needs_wrapper()
+                frags = []
+                if wrap:
+                    frags.append(r"\begin{scope}" + self.get_opt_code())
+                for el in self.elements:
+                    if isinstance(el, Scope):
+                        el._emit(frags)
+                    else:
+                        frags.append(el._code())
+                if wrap:
+                    frags.append(r"\end{scope}")
+                self._code_cache = frags
+            out.extend(frags)
+            return
+        # coordinate transformations may change between calls, so their
+        # output is not cached
+        out.append(r"\begin{scope}" + self.get_opt_code())
+        for el in self.elements:
+            if isinstance(el, Scope):
+                el._emit(out, trans)
+            else:
+                out.append(el._code(trans))
+        out.append(r"\end{scope}")
+
+    def _needs_wrapper(self):
+        "is the scope wrapper semantically required?"
+        if self.force_scope or self.get_opt_code() != "":
+            return True
+        for el in self.elements:
+            # raw code (tikzset, style, ...) and clipping act on everything
+            # up to the end of the surrounding scope; clipping can come from
+            # the action itself or from its options (path(..., clip=True)),
+            # so err on the side of keeping the wrapper
+            if isinstance(el, Raw):
+                return True
+            if isinstance(el, Action) and (
+                el.action_name == "clip" or "clip" in el.get_opt_code()
+            ):
+                return True
+        return False
+
     def _code(self, trans=None):
         """
         Returns TikZ code
         """
-        code = r"\begin{scope}" + self.get_opt_code() + "\n"
-        code += "\n".join(el._code(trans) for el in self.elements) + "\n"
-        code += r"\end{scope}"
-        return code
+        out = []
+        self._emit(out, trans)
+        return "\n".join(out)
 
     # add actions on paths (§15)
 